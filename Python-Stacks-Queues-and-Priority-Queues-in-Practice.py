@@ -17,4 +17,639 @@ class Stack(Queue):
     # ...
 
 class PriorityQueue(IterableMixin):
-    # ...
\ No newline at end of file
+    # ...
+
+# queues.py
+
+from queue import Full
+
+# ...
+
+class RingQueue(IterableMixin):
+    def __init__(self, *elements, capacity=16, maxsize=None, overwrite=False):
+        if maxsize is not None and maxsize <= 0:
+            maxsize = None
+        size = 1 << (max(capacity, len(elements), 1) - 1).bit_length()
+        if maxsize is not None:
+            size = min(size, 1 << (maxsize - 1).bit_length())
+        self._slots = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._length = 0
+        self._maxsize = maxsize
+        self._overwrite = overwrite
+        for element in elements:
+            self.enqueue(element)
+
+    def __len__(self):
+        return self._length
+
+    def enqueue(self, element):
+        if self._length == self._maxsize:
+            if not self._overwrite:
+                raise Full
+            self._slots[self._head] = None
+            self._head = (self._head + 1) & self._mask
+            self._length -= 1
+        elif self._length == len(self._slots):
+            self._grow()
+        self._slots[(self._head + self._length) & self._mask] = element
+        self._length += 1
+
+    def dequeue(self):
+        if self._length == 0:
+            raise IndexError("dequeue from an empty queue")
+        element, self._slots[self._head] = self._slots[self._head], None
+        self._head = (self._head + 1) & self._mask
+        self._length -= 1
+        return element
+
+    def _grow(self):
+        slots, head = self._slots, self._head
+        self._slots = slots[head:] + slots[:head] + [None] * len(slots)
+        self._mask = len(self._slots) - 1
+        self._head = 0
+
+class RingStack(RingQueue):
+    def dequeue(self):
+        if self._length == 0:
+            raise IndexError("dequeue from an empty stack")
+        index = (self._head + self._length - 1) & self._mask
+        element, self._slots[index] = self._slots[index], None
+        self._length -= 1
+        return element
+
+>>> from queues import RingQueue, RingStack
+
+>>> fifo = RingQueue("1st", "2nd", "3rd", maxsize=3, overwrite=True)
+>>> fifo.enqueue("4th")
+>>> list(fifo)
+['2nd', '3rd', '4th']
+
+>>> lifo = RingStack("1st", "2nd", maxsize=2)
+>>> lifo.enqueue("3rd")
+Traceback (most recent call last):
+  ...
+queue.Full
+
+# queues.py
+
+from itertools import count, repeat
+
+# ...
+
+class Queue(IterableMixin):
+    # ...
+
+    def enqueue_many(self, elements):
+        self._elements.extend(elements)
+
+    def dequeue_many(self, n):
+        if n >= len(self._elements):
+            elements = list(self._elements)
+            self._elements.clear()
+            return elements
+        return list(map(deque.popleft, repeat(self._elements, n)))
+
+class Stack(Queue):
+    # ...
+
+    def dequeue_many(self, n):
+        if n >= len(self._elements):
+            elements = list(reversed(self._elements))
+            self._elements.clear()
+            return elements
+        return list(map(deque.pop, repeat(self._elements, n)))
+
+class PriorityQueue(IterableMixin):
+    # ...
+
+    def enqueue_many(self, prioritized_values):
+        elements = [
+            (-priority, next(self._counter), value)
+            for priority, value in prioritized_values
+        ]
+        if len(elements) > len(self._elements):
+            self._elements.extend(elements)
+            heapify(self._elements)
+        else:
+            for element in elements:
+                heappush(self._elements, element)
+
+    def dequeue_many(self, n):
+        if n >= len(self._elements):
+            self._elements.sort()
+            elements, self._elements = self._elements, []
+        else:
+            elements = list(map(heappop, repeat(self._elements, n)))
+        return [value for *_, value in elements]
+
+class RingQueue(IterableMixin):
+    # ...
+
+    def enqueue_many(self, elements):
+        for element in elements:
+            self.enqueue(element)
+
+    def dequeue_many(self, n):
+        return [self.dequeue() for _ in range(min(n, self._length))]
+
+>>> from queues import PriorityQueue, Queue, Stack
+
+>>> fifo = Queue()
+>>> fifo.enqueue_many(range(1_000_000))
+>>> fifo.dequeue_many(3)
+[0, 1, 2]
+
+>>> lifo = Stack("1st", "2nd", "3rd")
+>>> lifo.dequeue_many(2)
+['3rd', '2nd']
+
+>>> messages = PriorityQueue()
+>>> messages.enqueue_many([
+...     (1, "Radio"),
+...     (3, "Windshield wipers"),
+...     (2, "Hazard lights"),
+... ])
+>>> messages.dequeue_many(10)
+['Windshield wipers', 'Hazard lights', 'Radio']
+
+# queues.py
+
+# ...
+
+class MutableMinHeap(IterableMixin):
+    def __init__(self):
+        super().__init__()
+        self._elements = []
+        self._positions = {}
+        self._priorities = {}
+        self._counter = count()
+
+    def __contains__(self, unique_value):
+        return unique_value in self._positions
+
+    def __setitem__(self, unique_value, priority):
+        self._priorities[unique_value] = priority
+        if (index := self._positions.get(unique_value)) is None:
+            index = len(self._elements)
+            self._elements.append([priority, next(self._counter), unique_value])
+            self._sift_up(index)
+        elif priority < self._elements[index][0]:
+            self._elements[index][0] = priority
+            self._sift_up(index)
+        else:
+            self._elements[index][0] = priority
+            self._sift_down(index)
+
+    def __getitem__(self, unique_value):
+        return self._priorities[unique_value]
+
+    def get(self, unique_value, default=None):
+        return self._priorities.get(unique_value, default)
+
+    def peek(self):
+        if not self._elements:
+            raise IndexError("peek from an empty heap")
+        return self._elements[0][-1]
+
+    def dequeue(self):
+        return self.pop_with_priority()[0]
+
+    def pop_with_priority(self):
+        if not self._elements:
+            raise IndexError("pop from an empty heap")
+        last = self._elements.pop()
+        if self._elements:
+            priority, _, unique_value = self._elements[0]
+            self._elements[0] = last
+            self._sift_down(0)
+        else:
+            priority, _, unique_value = last
+        del self._positions[unique_value]
+        return unique_value, priority
+
+    def _sift_up(self, index):
+        elements, positions = self._elements, self._positions
+        element = elements[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = elements[parent_index]
+            if element < parent:
+                elements[index] = parent
+                positions[parent[-1]] = index
+                index = parent_index
+            else:
+                break
+        elements[index] = element
+        positions[element[-1]] = index
+
+    def _sift_down(self, index):
+        elements, positions = self._elements, self._positions
+        element, size = elements[index], len(elements)
+        while (child_index := 2 * index + 1) < size:
+            child = elements[child_index]
+            if child_index + 1 < size and elements[child_index + 1] < child:
+                child_index += 1
+                child = elements[child_index]
+            if child < element:
+                elements[index] = child
+                positions[child[-1]] = index
+                index = child_index
+            else:
+                break
+        elements[index] = element
+        positions[element[-1]] = index
+
+class LazyMinHeap(MutableMinHeap):
+    def __init__(self):
+        super().__init__()
+        self._queued = {}
+
+    def __len__(self):
+        return len(self._queued)
+
+    def __contains__(self, unique_value):
+        return unique_value in self._queued
+
+    def __setitem__(self, unique_value, priority):
+        self._priorities[unique_value] = priority
+        if stale := self._queued.get(unique_value):
+            element = [priority, stale[1], unique_value]
+        else:
+            element = [priority, next(self._counter), unique_value]
+        self._queued[unique_value] = element
+        heappush(self._elements, element)
+
+    def peek(self):
+        self._discard_stale()
+        return super().peek()
+
+    def pop_with_priority(self):
+        self._discard_stale()
+        if not self._elements:
+            raise IndexError("pop from an empty heap")
+        priority, _, unique_value = heappop(self._elements)
+        del self._queued[unique_value]
+        return unique_value, priority
+
+    def _discard_stale(self):
+        elements, queued = self._elements, self._queued
+        while elements and queued.get(elements[0][-1]) is not elements[0]:
+            heappop(elements)
+
+>>> from queues import LazyMinHeap, MutableMinHeap
+
+>>> for heap in MutableMinHeap(), LazyMinHeap():
+...     heap["Aberdeen"] = 120
+...     heap["Perth"] = 45
+...     heap["Dundee"] = 60
+...     heap["Aberdeen"] = 30
+...     print(heap.peek(), "Perth" in heap, heap.pop_with_priority())
+...
+Aberdeen True ('Aberdeen', 30)
+Aberdeen True ('Aberdeen', 30)
+
+# queues.py
+
+# ...
+
+class DaryHeap:
+    def __init__(self, arity=4):
+        if arity < 2:
+            raise ValueError("arity must be at least 2")
+        self._elements = []
+        self._arity = arity
+
+    def __len__(self):
+        return len(self._elements)
+
+    def push(self, element):
+        self._elements.append(element)
+        self._sift_up(len(self._elements) - 1)
+
+    def pop(self):
+        if not self._elements:
+            raise IndexError("pop from an empty heap")
+        last = self._elements.pop()
+        if not self._elements:
+            return last
+        first, self._elements[0] = self._elements[0], last
+        self._sift_down(0)
+        return first
+
+    def extend(self, elements):
+        elements = list(elements)
+        if len(elements) > len(self._elements):
+            self._elements.extend(elements)
+            last_parent = (len(self._elements) - 2) // self._arity
+            for index in range(last_parent, -1, -1):
+                self._sift_down(index)
+        else:
+            for element in elements:
+                self.push(element)
+
+    def pop_many(self, n):
+        return [self.pop() for _ in range(min(n, len(self._elements)))]
+
+    def _sift_up(self, index):
+        elements, arity = self._elements, self._arity
+        element = elements[index]
+        while index > 0:
+            parent_index = (index - 1) // arity
+            if element < elements[parent_index]:
+                elements[index] = elements[parent_index]
+                index = parent_index
+            else:
+                break
+        elements[index] = element
+
+    def _sift_down(self, index):
+        elements, arity = self._elements, self._arity
+        size = len(elements)
+        element = elements[index]
+        while (child_index := arity * index + 1) < size:
+            child = elements[child_index]
+            for sibling_index in range(
+                child_index + 1, min(child_index + arity, size)
+            ):
+                if elements[sibling_index] < child:
+                    child_index = sibling_index
+                    child = elements[sibling_index]
+            if child < element:
+                elements[index] = child
+                index = child_index
+            else:
+                break
+        elements[index] = element
+
+class PairingHeap:
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, element):
+        self._root = self._meld(self._root, [element, []])
+        self._size += 1
+
+    def pop(self):
+        if self._root is None:
+            raise IndexError("pop from an empty heap")
+        element, children = self._root
+        self._root = self._merge_pairs(children)
+        self._size -= 1
+        return element
+
+    def extend(self, elements):
+        for element in elements:
+            self.push(element)
+
+    def pop_many(self, n):
+        return [self.pop() for _ in range(min(n, self._size))]
+
+    @staticmethod
+    def _meld(node1, node2):
+        if node1 is None:
+            return node2
+        if node2[0] < node1[0]:
+            node1, node2 = node2, node1
+        node1[1].append(node2)
+        return node1
+
+    def _merge_pairs(self, nodes):
+        if not nodes:
+            return None
+        pairs = [
+            self._meld(node1, node2)
+            for node1, node2 in zip(nodes[::2], nodes[1::2])
+        ]
+        if len(nodes) % 2:
+            pairs.append(nodes[-1])
+        root = pairs.pop()
+        while pairs:
+            root = self._meld(pairs.pop(), root)
+        return root
+
+class PriorityQueue(IterableMixin):
+    def __init__(self, backend="binary", arity=4):
+        match backend:
+            case "binary":
+                self._heap, self._elements = None, []
+            case "dary":
+                self._heap = self._elements = DaryHeap(arity)
+            case "pairing":
+                self._heap = self._elements = PairingHeap()
+            case _:
+                raise ValueError(f"unknown backend: {backend!r}")
+        self._counter = count()
+
+    def enqueue_with_priority(self, priority, value):
+        element = (-priority, next(self._counter), value)
+        if self._heap is None:
+            heappush(self._elements, element)
+        else:
+            self._heap.push(element)
+
+    def dequeue(self):
+        if self._heap is None:
+            return heappop(self._elements)[-1]
+        return self._heap.pop()[-1]
+
+    def enqueue_many(self, prioritized_values):
+        elements = [
+            (-priority, next(self._counter), value)
+            for priority, value in prioritized_values
+        ]
+        if self._heap is not None:
+            self._heap.extend(elements)
+        elif len(elements) > len(self._elements):
+            self._elements.extend(elements)
+            heapify(self._elements)
+        else:
+            for element in elements:
+                heappush(self._elements, element)
+
+    def dequeue_many(self, n):
+        if self._heap is not None:
+            elements = self._heap.pop_many(n)
+        elif n >= len(self._elements):
+            self._elements.sort()
+            elements, self._elements = self._elements, []
+        else:
+            elements = list(map(heappop, repeat(self._elements, n)))
+        return [value for *_, value in elements]
+
+>>> from queues import PriorityQueue
+
+>>> for backend in "binary", "dary", "pairing":
+...     messages = PriorityQueue(backend)
+...     messages.enqueue_with_priority(1, "Radio")
+...     messages.enqueue_with_priority(3, "Windshield wipers")
+...     messages.enqueue_with_priority(2, "Hazard lights")
+...     print(f"{backend:>7}:", list(messages))
+...
+ binary: ['Windshield wipers', 'Hazard lights', 'Radio']
+   dary: ['Windshield wipers', 'Hazard lights', 'Radio']
+pairing: ['Windshield wipers', 'Hazard lights', 'Radio']
+
+# priority_queue_benchmark.py
+
+import argparse
+import time
+from random import Random
+
+from queues import PriorityQueue
+
+BACKENDS = ("binary", "dary", "pairing")
+
+def relaxation_weights(num_nodes, degree, seed=42):
+    random = Random(seed)
+    return [
+        [random.uniform(1, 100) for _ in range(degree)]
+        for _ in range(num_nodes)
+    ]
+
+def simulate_dijkstra(queue, weights):
+    queue.enqueue_with_priority(0, 0)
+    for edge_weights in weights:
+        distance = queue.dequeue()
+        for weight in edge_weights:
+            queue.enqueue_with_priority(-(distance + weight), distance + weight)
+    while queue:
+        queue.dequeue()
+
+def main(args):
+    print(f"{'degree':>6} " + " ".join(f"{name:>9}" for name in BACKENDS))
+    for degree in args.degrees:
+        weights = relaxation_weights(args.num_nodes, degree)
+        timings = []
+        for backend in BACKENDS:
+            queue = PriorityQueue(backend, args.arity)
+            t1 = time.perf_counter()
+            simulate_dijkstra(queue, weights)
+            timings.append(time.perf_counter() - t1)
+        print(f"{degree:>6} " + " ".join(f"{t:>8.3f}s" for t in timings))
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--num-nodes", type=int, default=100_000)
+    parser.add_argument("-a", "--arity", type=int, default=4)
+    parser.add_argument(
+        "-d", "--degrees", type=int, nargs="+", default=[2, 4, 8]
+    )
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    main(parse_args())
+
+$ python priority_queue_benchmark.py
+degree    binary      dary   pairing
+     2    0.572s    2.333s    3.184s
+     4    1.874s    6.424s    9.410s
+     8    4.023s   14.422s   23.660s
+
+# queues.py
+
+# ...
+
+class IterableMixin:
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        return self.drain()
+
+    def drain(self):
+        while len(self) > 0:
+            yield self.dequeue()
+
+    def view(self):
+        return iter(self._elements)
+
+    def snapshot(self):
+        return tuple(self.view())
+
+    def peek_iter(self):
+        return self.view()
+
+class Stack(Queue):
+    # ...
+
+    def view(self):
+        return reversed(self._elements)
+
+class DaryHeap:
+    # ...
+
+    def view(self):
+        return iter(self._elements)
+
+class PairingHeap:
+    # ...
+
+    def view(self):
+        nodes = [self._root] if self._root else []
+        while nodes:
+            element, children = nodes.pop()
+            yield element
+            nodes.extend(children)
+
+class PriorityQueue(IterableMixin):
+    # ...
+
+    def view(self):
+        elements = self._elements if self._heap is None else self._heap.view()
+        return (element[-1] for element in elements)
+
+class RingQueue(IterableMixin):
+    # ...
+
+    def view(self):
+        slots, mask, head = self._slots, self._mask, self._head
+        return (slots[(head + i) & mask] for i in range(self._length))
+
+class RingStack(RingQueue):
+    # ...
+
+    def view(self):
+        slots, mask, head = self._slots, self._mask, self._head
+        return (
+            slots[(head + i) & mask] for i in reversed(range(self._length))
+        )
+
+class MutableMinHeap(IterableMixin):
+    # ...
+
+    def view(self):
+        return (element[-1] for element in self._elements)
+
+class LazyMinHeap(MutableMinHeap):
+    # ...
+
+    def view(self):
+        return (
+            element[-1]
+            for element in self._elements
+            if self._queued.get(element[-1]) is element
+        )
+
+>>> from queues import Queue, Stack
+
+>>> fifo = Queue("1st", "2nd", "3rd")
+>>> list(fifo.view())
+['1st', '2nd', '3rd']
+>>> fifo.snapshot()
+('1st', '2nd', '3rd')
+>>> len(fifo)
+3
+
+>>> lifo = Stack("1st", "2nd", "3rd")
+>>> lifo.snapshot()
+('3rd', '2nd', '1st')
+>>> list(lifo.drain())
+['3rd', '2nd', '1st']
+>>> len(lifo)
+0
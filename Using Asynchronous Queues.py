@@ -200,4 +200,2134 @@ async def main(args):
     finally:
         await session.close()
 
-# ...
\ No newline at end of file
+# ...
+
+# async_queues.py
+
+import hashlib
+from math import ceil, log
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# ...
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonicalize_url(url):
+    parts = urlsplit(url)
+    scheme, host = parts.scheme.lower(), (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if userinfo := parts.netloc.rpartition("@")[0]:
+        host = f"{userinfo}@{host}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+def canonicalize_link(url, href):
+    try:
+        return canonicalize_url(urljoin(url, href))
+    except ValueError:
+        return None
+
+def parse_links(url, html):
+    soup = BeautifulSoup(html, features="html.parser")
+    for anchor in soup.select("a[href]"):
+        href = anchor.get("href").lower()
+        if href.startswith("javascript:"):
+            continue
+        if link_url := canonicalize_link(url, href):
+            yield link_url
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.num_bits = ceil(-capacity * log(error_rate) / log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def __contains__(self, item):
+        return all(
+            self._bits[i >> 3] & (1 << (i & 7)) for i in self._positions(item)
+        )
+
+    def add(self, item):
+        for i in self._positions(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        hash1 = int.from_bytes(digest[:8], "little")
+        hash2 = int.from_bytes(digest[8:], "little") | 1
+        return [
+            (hash1 + i * hash2) % self.num_bits for i in range(self.num_hashes)
+        ]
+
+class SeenURLs:
+    def __init__(self, urls=None):
+        self._urls = set() if urls is None else urls
+
+    def __contains__(self, url):
+        return canonicalize_url(url) in self._urls
+
+    def add(self, url):
+        url = canonicalize_url(url)
+        if url in self._urls:
+            return False
+        self._urls.add(url)
+        return True
+
+# ...
+
+async def worker(worker_id, session, queue, links, max_depth, seen):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            if html := await fetch_html(session, url):
+                for link_url in parse_links(url, html):
+                    links[link_url] += 1
+                    if depth < max_depth and seen.add(link_url):
+                        await queue.put(Job(link_url, depth + 1))
+        except aiohttp.ClientError:
+            print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+        finally:
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    session = aiohttp.ClientSession()
+    try:
+        links = Counter()
+        queue = asyncio.PriorityQueue()
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+
+        root_url = canonicalize_url(args.url)
+        links[root_url] += 1
+        seen.add(root_url)
+        await queue.put(Job(root_url))
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    return parser.parse_args()
+
+>>> from async_queues import canonicalize_url
+>>> canonicalize_url("HTTPS://Example.COM:443/search?q=queue&a=1#results")
+'https://example.com/search?a=1&q=queue'
+
+# async_queues.py
+
+from collections import Counter, deque
+from time import monotonic
+
+# ...
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = monotonic()
+
+    def try_take(self):
+        now = monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class Host:
+    def __init__(self, max_connections, rate):
+        self.pending = deque()
+        self.in_flight = 0
+        self.max_connections = max_connections
+        self.bucket = TokenBucket(rate) if rate else None
+
+class HostScheduler:
+    def __init__(self, max_per_host=2, host_rate=0):
+        self.max_per_host = max_per_host
+        self.host_rate = host_rate
+        self._hosts = {}
+        self._rotation = deque()
+        self._changed = asyncio.Condition()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self):
+        return sum(len(host.pending) for host in self._hosts.values())
+
+    def empty(self):
+        return not any(host.pending for host in self._hosts.values())
+
+    async def put(self, job):
+        host_name = urlsplit(job.url).netloc
+        if (host := self._hosts.get(host_name)) is None:
+            host = self._hosts[host_name] = Host(
+                self.max_per_host, self.host_rate
+            )
+        if not host.pending:
+            self._rotation.append(host_name)
+        host.pending.append(job)
+        self._unfinished += 1
+        self._finished.clear()
+        async with self._changed:
+            self._changed.notify()
+
+    async def get(self):
+        async with self._changed:
+            while True:
+                job, delay = self._take_ready()
+                if job is not None:
+                    return job
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url):
+        self._hosts[urlsplit(url).netloc].in_flight -= 1
+        async with self._changed:
+            self._changed.notify()
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _take_ready(self):
+        delay = None
+        for _ in range(len(self._rotation)):
+            host_name = self._rotation[0]
+            self._rotation.rotate(-1)
+            host = self._hosts[host_name]
+            if host.in_flight >= host.max_connections:
+                continue
+            if host.bucket and (wait := host.bucket.try_take()):
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            job = host.pending.popleft()
+            host.in_flight += 1
+            if not host.pending:
+                self._rotation.remove(host_name)
+            return job, None
+        return None, delay
+
+# ...
+
+async def worker(worker_id, session, queue, links, max_depth, seen):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            if html := await fetch_html(session, url):
+                for link_url in parse_links(url, html):
+                    links[link_url] += 1
+                    if depth < max_depth and seen.add(link_url):
+                        await queue.put(Job(link_url, depth + 1))
+        except aiohttp.ClientError:
+            print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    try:
+        links = Counter()
+        queue = HostScheduler(args.max_per_host, args.host_rate)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+
+        root_url = canonicalize_url(args.url)
+        links[root_url] += 1
+        seen.add(root_url)
+        await queue.put(Job(root_url))
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    return parser.parse_args()
+
+# async_queues.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+# ...
+
+class AnchorScanner(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            hrefs = [value for name, value in attrs if name == "href"]
+            if hrefs:
+                self.hrefs.append(hrefs[-1] or "")
+
+def scan_links(url, html):
+    scanner = AnchorScanner()
+    scanner.feed(html)
+    scanner.close()
+    for href in scanner.hrefs:
+        href = href.lower()
+        if href.startswith("javascript:"):
+            continue
+        if link_url := canonicalize_link(url, href):
+            yield link_url
+
+def extract_links(url, html, fast=False):
+    return list(scan_links(url, html) if fast else parse_links(url, html))
+
+class ParserPool:
+    def __init__(self, executor, max_in_flight, fast=False):
+        self.executor = executor
+        self.fast = fast
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def parse(self, url, html):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, extract_links, url, html, self.fast
+            )
+
+# ...
+
+async def worker(worker_id, session, queue, links, max_depth, seen, parser):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            if html := await fetch_html(session, url):
+                for link_url in await parser.parse(url, html):
+                    links[link_url] += 1
+                    if depth < max_depth and seen.add(link_url):
+                        await queue.put(Job(link_url, depth + 1))
+        except aiohttp.ClientError:
+            print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    try:
+        links = Counter()
+        queue = HostScheduler(args.max_per_host, args.host_rate)
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+
+        root_url = canonicalize_url(args.url)
+        links[root_url] += 1
+        seen.add(root_url)
+        await queue.put(Job(root_url))
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    return parser.parse_args()
+
+# async_queues.py
+
+import os
+import pickle
+import tempfile
+from heapq import heapify, heappop, heappush
+
+# ...
+
+class SpillStore:
+    def __init__(self, window=10_000, order="fifo", path=None):
+        if order not in ("fifo", "lifo", "priority"):
+            raise ValueError(f"unknown order: {order!r}")
+        self.window = window
+        self.order = order
+        self._chunk_size = max(1, window // 2)
+        self._memory = deque() if order == "fifo" else []
+        self._buffer = []
+        self._runs = []
+        self._spilled = 0
+        self._live = 0
+        self._file = open(path, "w+b") if path else tempfile.TemporaryFile()
+
+    def __len__(self):
+        return len(self._memory) + len(self._buffer) + self._spilled
+
+    def close(self):
+        self._file.close()
+
+    def push(self, item):
+        match self.order:
+            case "fifo":
+                spilling = self._runs or self._buffer
+                if spilling or len(self._memory) >= self.window:
+                    self._buffer.append(item)
+                    if len(self._buffer) >= self._chunk_size:
+                        self._write_run(self._buffer)
+                        self._buffer = []
+                else:
+                    self._memory.append(item)
+            case "lifo":
+                self._memory.append(item)
+                if len(self._memory) > self.window:
+                    self._write_run(self._memory[: self._chunk_size])
+                    del self._memory[: self._chunk_size]
+            case "priority":
+                heappush(self._memory, item)
+                if len(self._memory) > self.window:
+                    self._spill_worst()
+
+    def pop(self):
+        match self.order:
+            case "fifo":
+                if not self._memory:
+                    if self._runs:
+                        self._memory.extend(self._read_run(0))
+                    else:
+                        self._memory.extend(self._buffer)
+                        self._buffer = []
+                return self._memory.popleft()
+            case "lifo":
+                if not self._memory:
+                    self._memory = self._read_run(-1)
+                return self._memory.pop()
+            case "priority":
+                if self._runs:
+                    index = min(
+                        range(len(self._runs)), key=lambda i: self._runs[i][-1]
+                    )
+                    head = self._runs[index][-1]
+                    if not self._memory or head < self._memory[0]:
+                        self._memory.extend(self._read_run(index))
+                        if len(self._memory) > self.window:
+                            self._spill_worst()
+                        else:
+                            heapify(self._memory)
+                return heappop(self._memory)
+
+    def _spill_worst(self):
+        self._memory.sort()
+        self._write_run(self._memory[self._chunk_size :])
+        del self._memory[self._chunk_size :]
+
+    def _write_run(self, items):
+        data = pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._runs.append((offset, len(data), len(items), items[0]))
+        self._spilled += len(items)
+        self._live += len(data)
+
+    def _read_run(self, index):
+        offset, size, count, _ = self._runs.pop(index)
+        self._file.seek(offset)
+        items = pickle.loads(self._file.read(size))
+        self._spilled -= count
+        self._live -= size
+        if self._file.seek(0, os.SEEK_END) > 2 * self._live:
+            self._compact()
+        return items
+
+    def _compact(self):
+        end = 0
+        by_offset = sorted(
+            range(len(self._runs)), key=lambda i: self._runs[i][0]
+        )
+        for index in by_offset:
+            offset, size, *rest = self._runs[index]
+            if offset != end:
+                self._file.seek(offset)
+                data = self._file.read(size)
+                self._file.seek(end)
+                self._file.write(data)
+            self._runs[index] = (end, size, *rest)
+            end += size
+        self._file.truncate(end)
+
+class SpillingQueue(asyncio.Queue):
+    def __init__(self, maxsize=0, window=10_000, order="fifo", path=None):
+        self._spill_options = window, order, path
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self._queue = SpillStore(*self._spill_options)
+
+    def _put(self, item):
+        self._queue.push(item)
+
+    def _get(self):
+        return self._queue.pop()
+
+    def close(self):
+        self._queue.close()
+
+# ...
+
+class HostScheduler:
+    def __init__(
+        self, max_per_host=2, host_rate=0, window=10_000, maxsize=0
+    ):
+        self.max_per_host = max_per_host
+        self.host_rate = host_rate
+        self.window = window
+        self.maxsize = maxsize
+        self._hosts = {}
+        self._rotation = deque()
+        self._in_memory = 0
+        self._overflow = SpillStore(window)
+        self._holders = Counter()
+        self._stalled = 0
+        self._changed = asyncio.Condition()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self):
+        return self._in_memory + len(self._overflow)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def close(self):
+        self._overflow.close()
+
+    async def put(self, job):
+        holder = asyncio.current_task() in self._holders
+        async with self._changed:
+            while self._must_wait(holder):
+                self._stalled += holder
+                try:
+                    await self._changed.wait()
+                finally:
+                    self._stalled -= holder
+            if self._overflow or self._in_memory >= self.window:
+                self._overflow.push(job)
+            else:
+                self._schedule(job)
+            self._unfinished += 1
+            self._finished.clear()
+            self._changed.notify_all()
+
+    async def get(self):
+        async with self._changed:
+            while True:
+                job, delay = self._take_ready()
+                if job is not None:
+                    while self._overflow and self._in_memory < self.window:
+                        self._schedule(self._overflow.pop())
+                    self._holders[asyncio.current_task()] += 1
+                    self._changed.notify_all()
+                    return job
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url):
+        self._hosts[urlsplit(url).netloc].in_flight -= 1
+        holder = asyncio.current_task()
+        self._holders[holder] -= 1
+        if not self._holders[holder]:
+            del self._holders[holder]
+        async with self._changed:
+            self._changed.notify_all()
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _must_wait(self, holder):
+        if not self.maxsize or self.qsize() < self.maxsize:
+            return False
+        return not holder or len(self._holders) - self._stalled > 1
+
+    def _schedule(self, job):
+        host_name = urlsplit(job.url).netloc
+        if (host := self._hosts.get(host_name)) is None:
+            host = self._hosts[host_name] = Host(
+                self.max_per_host, self.host_rate
+            )
+        if not host.pending:
+            self._rotation.append(host_name)
+        host.pending.append(job)
+        self._in_memory += 1
+
+    def _take_ready(self):
+        delay = None
+        for _ in range(len(self._rotation)):
+            host_name = self._rotation[0]
+            self._rotation.rotate(-1)
+            host = self._hosts[host_name]
+            if host.in_flight >= host.max_connections:
+                continue
+            if host.bucket and (wait := host.bucket.try_take()):
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            job = host.pending.popleft()
+            host.in_flight += 1
+            self._in_memory -= 1
+            if not host.pending:
+                self._rotation.remove(host_name)
+            return job, None
+        return None, delay
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+    )
+    try:
+        links = Counter()
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+
+        root_url = canonicalize_url(args.url)
+        links[root_url] += 1
+        seen.add(root_url)
+        await queue.put(Job(root_url))
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    return parser.parse_args()
+
+>>> import asyncio
+>>> from async_queues import Job, SpillingQueue
+
+>>> async def demo():
+...     queue = SpillingQueue(window=4, order="lifo")
+...     for i in range(10):
+...         await queue.put(Job(f"https://example.com/{i}"))
+...     return [(await queue.get()).url[-1] for _ in range(10)]
+...
+>>> asyncio.run(demo())
+['9', '8', '7', '6', '5', '4', '3', '2', '1', '0']
+
+# async_queues.py
+
+from itertools import count
+
+# ...
+
+class Job(NamedTuple):
+    url: str
+    depth: int = 1
+
+def breadth_first(job):
+    return job.depth
+
+def depth_first(job):
+    return -job.depth
+
+def shortest_url(job):
+    return len(job.url)
+
+class HostFairness:
+    def __init__(self):
+        self.scheduled = Counter()
+
+    def __call__(self, job):
+        host_name = urlsplit(job.url).netloc
+        self.scheduled[host_name] += 1
+        return self.scheduled[host_name]
+
+SCORERS = {
+    "breadth-first": breadth_first,
+    "depth-first": depth_first,
+    "shortest-url": shortest_url,
+    "host-fairness": HostFairness,
+}
+
+def make_scorer(score):
+    if isinstance(score, str):
+        score = SCORERS[score]
+    return score() if isinstance(score, type) else score
+
+class ScoredQueue(asyncio.PriorityQueue):
+    def __init__(self, maxsize=0, score=breadth_first):
+        self.score = make_scorer(score)
+        self._counter = count()
+        super().__init__(maxsize)
+
+    def _put(self, job):
+        super()._put((self.score(job), next(self._counter), job))
+
+    def _get(self):
+        return super()._get()[-1]
+
+# ...
+
+class Host:
+    def __init__(self, max_connections, rate):
+        self.pending = []
+        self.head = None
+        self.throttled = False
+        self.in_flight = 0
+        self.max_connections = max_connections
+        self.bucket = TokenBucket(rate) if rate else None
+
+class HostScheduler:
+    def __init__(
+        self,
+        max_per_host=2,
+        host_rate=0,
+        window=10_000,
+        maxsize=0,
+        score=breadth_first,
+    ):
+        self.max_per_host = max_per_host
+        self.host_rate = host_rate
+        self.window = window
+        self.maxsize = maxsize
+        self.score = make_scorer(score)
+        self._counter = count()
+        self._hosts = {}
+        self._ready = []
+        self._throttled = []
+        self._in_memory = 0
+        self._overflow = SpillStore(window, "priority")
+        self._holders = Counter()
+        self._stalled = 0
+        self._changed = asyncio.Condition()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self):
+        return self._in_memory + len(self._overflow)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def close(self):
+        self._overflow.close()
+
+    async def put(self, job):
+        entry = (self.score(job), next(self._counter), job)
+        holder = asyncio.current_task() in self._holders
+        async with self._changed:
+            while self._must_wait(holder):
+                self._stalled += holder
+                try:
+                    await self._changed.wait()
+                finally:
+                    self._stalled -= holder
+            if self._overflow or self._in_memory >= self.window:
+                self._overflow.push(entry)
+            else:
+                self._schedule(entry)
+            self._unfinished += 1
+            self._finished.clear()
+            self._changed.notify_all()
+
+    async def get(self):
+        async with self._changed:
+            while True:
+                job, delay = self._take_ready()
+                if job is not None:
+                    while self._overflow and self._in_memory < self.window:
+                        self._schedule(self._overflow.pop())
+                    self._holders[asyncio.current_task()] += 1
+                    self._changed.notify_all()
+                    return job
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url):
+        host_name = urlsplit(url).netloc
+        host = self._hosts[host_name]
+        host.in_flight -= 1
+        self._wake(host_name, host)
+        holder = asyncio.current_task()
+        self._holders[holder] -= 1
+        if not self._holders[holder]:
+            del self._holders[holder]
+        async with self._changed:
+            self._changed.notify_all()
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def _must_wait(self, holder):
+        if not self.maxsize or self.qsize() < self.maxsize:
+            return False
+        return not holder or len(self._holders) - self._stalled > 1
+
+    def _schedule(self, entry):
+        host_name = urlsplit(entry[-1].url).netloc
+        if (host := self._hosts.get(host_name)) is None:
+            host = self._hosts[host_name] = Host(
+                self.max_per_host, self.host_rate
+            )
+        heappush(host.pending, entry)
+        self._in_memory += 1
+        self._wake(host_name, host)
+
+    def _wake(self, host_name, host):
+        if (
+            host.pending
+            and not host.throttled
+            and host.in_flight < host.max_connections
+            and host.head is not host.pending[0]
+        ):
+            host.head = host.pending[0]
+            heappush(self._ready, (host.head, host_name))
+
+    def _take_ready(self):
+        now = monotonic()
+        while self._throttled and self._throttled[0][0] <= now:
+            _, host_name = heappop(self._throttled)
+            host = self._hosts[host_name]
+            host.throttled = False
+            self._wake(host_name, host)
+        while self._ready:
+            head, host_name = heappop(self._ready)
+            host = self._hosts[host_name]
+            if head is not host.head:
+                continue
+            host.head = None
+            if host.in_flight >= host.max_connections:
+                continue
+            if host.bucket and (wait := host.bucket.try_take()):
+                host.throttled = True
+                heappush(self._throttled, (now + wait, host_name))
+                continue
+            *_, job = heappop(host.pending)
+            host.in_flight += 1
+            self._in_memory -= 1
+            self._wake(host_name, host)
+            return job, None
+        if self._throttled:
+            return None, self._throttled[0][0] - now
+        return None, None
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+        args.crawl_order,
+    )
+    try:
+        links = Counter()
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+
+        root_url = canonicalize_url(args.url)
+        links[root_url] += 1
+        seen.add(root_url)
+        await queue.put(Job(root_url))
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--crawl-order",
+        choices=SCORERS,
+        default="breadth-first",
+    )
+    return parser.parse_args()
+
+>>> import asyncio
+>>> from async_queues import Job, ScoredQueue
+
+>>> async def demo(score):
+...     queue = ScoredQueue(score=score)
+...     for job in Job("https://a.com/long/path", 1), Job("https://b.com/", 3):
+...         await queue.put(job)
+...     return [queue.get_nowait().url for _ in range(queue.qsize())]
+...
+>>> asyncio.run(demo("depth-first"))
+['https://b.com/', 'https://a.com/long/path']
+>>> asyncio.run(demo(lambda job: -len(job.url)))
+['https://a.com/long/path', 'https://b.com/']
+
+# async_queues.py
+
+import sqlite3
+
+# ...
+
+class CrawlCheckpoint:
+    def __init__(self, path, resume=False):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS frontier ("
+                "url TEXT PRIMARY KEY, depth INTEGER, done INTEGER DEFAULT 0)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS links ("
+                "url TEXT PRIMARY KEY, count INTEGER)"
+            )
+            if not resume:
+                self.connection.execute("DELETE FROM frontier")
+                self.connection.execute("DELETE FROM links")
+        self._jobs = []
+        self._done = []
+        self._links = Counter()
+
+    def seed(self, job):
+        self._jobs.append(job)
+        self._links[job.url] += 1
+        self.flush()
+
+    def record(self, url, found, jobs):
+        self._done.append((url,))
+        self._jobs.extend(jobs)
+        self._links.update(found)
+
+    def restore(self, links, seen):
+        links.update(dict(self.connection.execute("SELECT * FROM links")))
+        for (url,) in self.connection.execute("SELECT url FROM frontier"):
+            seen.add(url)
+        return [
+            Job(url, depth)
+            for url, depth in self.connection.execute(
+                "SELECT url, depth FROM frontier WHERE done = 0"
+            )
+        ]
+
+    def flush(self):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)",
+                self._jobs,
+            )
+            self.connection.executemany(
+                "UPDATE frontier SET done = 1 WHERE url = ?", self._done
+            )
+            self.connection.executemany(
+                "INSERT INTO links (url, count) VALUES (?, ?) "
+                "ON CONFLICT (url) DO UPDATE "
+                "SET count = count + excluded.count",
+                self._links.items(),
+            )
+        self._jobs, self._done, self._links = [], [], Counter()
+
+    async def autosave(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+# ...
+
+async def worker(
+    worker_id, session, queue, links, max_depth, seen, parser, checkpoint
+):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            found = []
+            try:
+                if html := await fetch_html(session, url):
+                    found = await parser.parse(url, html)
+            except aiohttp.ClientError:
+                print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+            links.update(found)
+            jobs = [
+                Job(link_url, depth + 1)
+                for link_url in found
+                if depth < max_depth and seen.add(link_url)
+            ]
+            if checkpoint:
+                checkpoint.record(url, found, jobs)
+            for job in jobs:
+                await queue.put(job)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+        args.crawl_order,
+    )
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = CrawlCheckpoint(args.checkpoint, args.resume)
+    try:
+        links = Counter()
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                    checkpoint,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+        if checkpoint:
+            tasks.append(
+                asyncio.create_task(
+                    checkpoint.autosave(args.checkpoint_interval)
+                )
+            )
+
+        if args.resume:
+            jobs = checkpoint.restore(links, seen)
+        else:
+            root_url = canonicalize_url(args.url)
+            links[root_url] += 1
+            seen.add(root_url)
+            jobs = [Job(root_url)]
+            if checkpoint:
+                checkpoint.seed(jobs[0])
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        display(links)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--crawl-order",
+        choices=SCORERS,
+        default="breadth-first",
+    )
+    parser.add_argument("-k", "--checkpoint")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    return args
+
+# async_queues.py
+
+import json
+from heapq import heapreplace
+from operator import itemgetter
+
+# ...
+
+class Result(NamedTuple):
+    url: str
+    depth: int
+    status: int | None
+    links_found: int
+
+class TopLinks(Counter):
+    def __init__(self, k=100):
+        self.k = k
+        self._top = {}
+        self._heap = []
+        super().__init__()
+
+    def __setitem__(self, url, count):
+        super().__setitem__(url, count)
+        self._track(url, count)
+
+    def most_common(self, n=None):
+        ranking = sorted(self._top.items(), key=itemgetter(1), reverse=True)
+        return ranking if n is None else ranking[:n]
+
+    def _track(self, url, count):
+        if url in self._top:
+            self._top[url] = count
+            heappush(self._heap, (count, url))
+        elif len(self._top) < self.k:
+            self._top[url] = count
+            heappush(self._heap, (count, url))
+        else:
+            while self._top.get(self._heap[0][1]) != self._heap[0][0]:
+                heappop(self._heap)
+            if count > self._heap[0][0]:
+                _, evicted = heapreplace(self._heap, (count, url))
+                del self._top[evicted]
+                self._top[url] = count
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(count, url) for url, count in self._top.items()]
+            heapify(self._heap)
+
+async def fetch_html(session, url):
+    async with session.get(url) as response:
+        if response.ok and response.content_type == "text/html":
+            return response.status, await response.text()
+        return response.status, None
+
+async def stream_results(results):
+    while (result := await results.get()) is not None:
+        yield result
+
+async def write_results(results, file):
+    async for result in stream_results(results):
+        file.write(json.dumps(result._asdict()) + "\n")
+        if results.empty():
+            file.flush()
+
+async def report_top(links, interval, n=10):
+    while True:
+        await asyncio.sleep(interval)
+        for url, count in links.most_common(n):
+            print(f"[top {count:>3} {url}]", file=sys.stderr)
+
+# ...
+
+async def worker(
+    worker_id,
+    session,
+    queue,
+    links,
+    max_depth,
+    seen,
+    parser,
+    checkpoint,
+    results,
+):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            status, found = None, []
+            try:
+                status, html = await fetch_html(session, url)
+                if html:
+                    found = await parser.parse(url, html)
+            except aiohttp.ClientError:
+                print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+            links.update(found)
+            jobs = [
+                Job(link_url, depth + 1)
+                for link_url in found
+                if depth < max_depth and seen.add(link_url)
+            ]
+            if checkpoint:
+                checkpoint.record(url, found, jobs)
+            if results:
+                await results.put(Result(url, depth, status, len(found)))
+            for job in jobs:
+                await queue.put(job)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+        args.crawl_order,
+    )
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = CrawlCheckpoint(args.checkpoint, args.resume)
+    results = writer = None
+    if args.results:
+        results = asyncio.Queue(maxsize=1000)
+        if args.results == "-":
+            results_file = sys.stdout
+        else:
+            results_file = open(args.results, mode="a", encoding="utf-8")
+        writer = asyncio.create_task(write_results(results, results_file))
+    try:
+        links = TopLinks(args.top)
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                    checkpoint,
+                    results,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+        if checkpoint:
+            tasks.append(
+                asyncio.create_task(
+                    checkpoint.autosave(args.checkpoint_interval)
+                )
+            )
+        if args.report_interval:
+            tasks.append(
+                asyncio.create_task(report_top(links, args.report_interval))
+            )
+
+        if args.resume:
+            jobs = checkpoint.restore(links, seen)
+        else:
+            root_url = canonicalize_url(args.url)
+            links.update([root_url])
+            seen.add(root_url)
+            jobs = [Job(root_url)]
+            if checkpoint:
+                checkpoint.seed(jobs[0])
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if writer:
+            await results.put(None)
+            await writer
+        if args.results != "-":
+            display(links)
+    finally:
+        if writer:
+            writer.cancel()
+            if results_file is not sys.stdout:
+                results_file.close()
+        if checkpoint:
+            checkpoint.close()
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--crawl-order",
+        choices=SCORERS,
+        default="breadth-first",
+    )
+    parser.add_argument("-k", "--checkpoint")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("-j", "--results")
+    parser.add_argument("-t", "--top", type=int, default=100)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    return args
+
+>>> from async_queues import TopLinks
+>>> links = TopLinks(k=2)
+>>> links.update(["/a", "/b", "/c", "/c", "/b", "/c"])
+>>> links.most_common()
+[('/c', 3), ('/b', 2)]
+>>> links.update(url for url in ["/a", "/a", "/a"])
+>>> links["/d"] += 5
+>>> links.most_common()
+[('/d', 5), ('/a', 4)]
+
+# async_queues.py
+
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli  # noqa: F401
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+else:
+    ACCEPT_ENCODING = "gzip, deflate, br"
+
+# ...
+
+class CachedResponse(NamedTuple):
+    etag: str | None
+    last_modified: str | None
+    html: str
+
+class ResponseCache:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.executor = ThreadPoolExecutor(1)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "body BLOB)"
+            )
+
+    def get(self, url):
+        row = self.connection.execute(
+            "SELECT etag, last_modified, body FROM responses WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row:
+            etag, last_modified, body = row
+            html = zlib.decompress(body).decode("utf-8")
+            return CachedResponse(etag, last_modified, html)
+
+    def put(self, url, etag, last_modified, html):
+        body = zlib.compress(html.encode("utf-8"))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, body),
+            )
+
+    async def lookup(self, url):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.get, url)
+
+    async def store(self, url, etag, last_modified, html):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor, self.put, url, etag, last_modified, html
+        )
+
+    def close(self):
+        self.executor.shutdown()
+        self.connection.close()
+
+async def fetch_html(session, url, cache=None):
+    headers = {"Accept": "text/html", "Accept-Encoding": ACCEPT_ENCODING}
+    cached = await cache.lookup(url) if cache else None
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304 and cached:
+            return response.status, cached.html
+        if not response.ok or response.content_type != "text/html":
+            response.close()
+            return response.status, None
+        html = await response.text()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+    if cache and (etag or last_modified):
+        await cache.store(url, etag, last_modified, html)
+    return response.status, html
+
+# ...
+
+async def worker(
+    worker_id,
+    session,
+    queue,
+    links,
+    max_depth,
+    seen,
+    parser,
+    checkpoint,
+    results,
+    cache,
+):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while True:
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            status, found = None, []
+            try:
+                status, html = await fetch_html(session, url, cache)
+                if html:
+                    found = await parser.parse(url, html)
+            except aiohttp.ClientError:
+                print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+            links.update(found)
+            jobs = [
+                Job(link_url, depth + 1)
+                for link_url in found
+                if depth < max_depth and seen.add(link_url)
+            ]
+            if checkpoint:
+                checkpoint.record(url, found, jobs)
+            if results:
+                await results.put(Result(url, depth, status, len(found)))
+            for job in jobs:
+                await queue.put(job)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+        args.crawl_order,
+    )
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = CrawlCheckpoint(args.checkpoint, args.resume)
+    cache = ResponseCache(args.cache) if args.cache else None
+    results = writer = None
+    if args.results:
+        results = asyncio.Queue(maxsize=1000)
+        if args.results == "-":
+            results_file = sys.stdout
+        else:
+            results_file = open(args.results, mode="a", encoding="utf-8")
+        writer = asyncio.create_task(write_results(results, results_file))
+    try:
+        links = TopLinks(args.top)
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        tasks = [
+            asyncio.create_task(
+                worker(
+                    f"Worker-{i + 1}",
+                    session,
+                    queue,
+                    links,
+                    args.max_depth,
+                    seen,
+                    parser,
+                    checkpoint,
+                    results,
+                    cache,
+                )
+            )
+            for i in range(args.num_workers)
+        ]
+        if checkpoint:
+            tasks.append(
+                asyncio.create_task(
+                    checkpoint.autosave(args.checkpoint_interval)
+                )
+            )
+        if args.report_interval:
+            tasks.append(
+                asyncio.create_task(report_top(links, args.report_interval))
+            )
+
+        if args.resume:
+            jobs = checkpoint.restore(links, seen)
+        else:
+            root_url = canonicalize_url(args.url)
+            links.update([root_url])
+            seen.add(root_url)
+            jobs = [Job(root_url)]
+            if checkpoint:
+                checkpoint.seed(jobs[0])
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if writer:
+            await results.put(None)
+            await writer
+        if args.results != "-":
+            display(links)
+    finally:
+        if writer:
+            writer.cancel()
+            if results_file is not sys.stdout:
+                results_file.close()
+        if cache:
+            cache.close()
+        if checkpoint:
+            checkpoint.close()
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--crawl-order",
+        choices=SCORERS,
+        default="breadth-first",
+    )
+    parser.add_argument("-k", "--checkpoint")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("-j", "--results")
+    parser.add_argument("-t", "--top", type=int, default=100)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("-x", "--cache")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    return args
+
+# async_queues.py
+
+from functools import partial
+
+# ...
+
+class Autoscaler:
+    def __init__(
+        self,
+        spawn,
+        workers,
+        min_workers,
+        max_workers,
+        interval=1.0,
+        max_error_rate=0.1,
+        latency_factor=1.5,
+    ):
+        self.spawn = spawn
+        self.target = workers
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.max_error_rate = max_error_rate
+        self.latency_factor = latency_factor
+        self.baseline = None
+        self.tasks = {}
+        self._ids = count(1)
+        self._retiring = 0
+        self._fetches = 0
+        self._errors = 0
+        self._busy = 0.0
+
+    def observe(self, latency, failed):
+        self._fetches += 1
+        self._errors += failed
+        self._busy += latency
+
+    def retire(self):
+        if self._retiring:
+            self._retiring -= 1
+            return True
+        return False
+
+    async def run(self, queue):
+        while True:
+            self.scale_to(self.target)
+            await asyncio.sleep(self.interval)
+            self.adjust(queue.qsize())
+
+    def adjust(self, backlog):
+        fetches, errors, busy = self._fetches, self._errors, self._busy
+        self._fetches = self._errors = 0
+        self._busy = 0.0
+        if not self.target:
+            if backlog:
+                self.scale_to(1)
+            return
+        if not fetches:
+            return
+        latency = busy / fetches
+        baseline = self.baseline or latency
+        self.baseline = min(latency, baseline * 1.02)
+        utilization = busy / (self.interval * self.target)
+        if (
+            errors / fetches > self.max_error_rate
+            or latency > self.latency_factor * baseline
+        ):
+            self.scale_to(max(self.min_workers, self.target // 2))
+        elif backlog and utilization > 0.5:
+            self.scale_to(min(self.max_workers, self.target + 1))
+
+    def scale_to(self, target):
+        if target != self.target:
+            print(
+                f"[autoscaler {self.target} -> {target} workers]",
+                file=sys.stderr,
+            )
+        self.target = target
+        active = len(self.tasks) - self._retiring
+        if active > target:
+            self._retiring += active - target
+        else:
+            revived = min(self._retiring, target - active)
+            self._retiring -= revived
+            for _ in range(target - active - revived):
+                self._start()
+
+    def _start(self):
+        worker_id = f"Worker-{next(self._ids)}"
+        task = asyncio.create_task(self.spawn(worker_id, autoscaler=self))
+        task.add_done_callback(partial(self._stopped, worker_id))
+        self.tasks[worker_id] = task
+
+    def _stopped(self, worker_id, task):
+        self.tasks.pop(worker_id, None)
+        if not task.cancelled() and (error := task.exception()):
+            print(f"[{worker_id} died: {error!r}]", file=sys.stderr)
+
+# ...
+
+async def worker(
+    worker_id,
+    session,
+    queue,
+    links,
+    max_depth,
+    seen,
+    parser,
+    checkpoint,
+    results,
+    cache,
+    autoscaler,
+):
+    print(f"[{worker_id} starting]", file=sys.stderr)
+    while not autoscaler.retire():
+        url, depth = await queue.get()
+        try:
+            print(f"[{worker_id} {depth=} {url=}]", file=sys.stderr)
+            status = html = None
+            found = []
+            started = monotonic()
+            try:
+                status, html = await fetch_html(session, url, cache)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                print(f"[{worker_id} failed at {url=}]", file=sys.stderr)
+            autoscaler.observe(
+                monotonic() - started,
+                status is None or status == 429 or status >= 500,
+            )
+            if html:
+                found = await parser.parse(url, html)
+            links.update(found)
+            jobs = [
+                Job(link_url, depth + 1)
+                for link_url in found
+                if depth < max_depth and seen.add(link_url)
+            ]
+            if checkpoint:
+                checkpoint.record(url, found, jobs)
+            if results:
+                await results.put(Result(url, depth, status, len(found)))
+            for job in jobs:
+                await queue.put(job)
+        finally:
+            await queue.release(url)
+            queue.task_done()
+    print(f"[{worker_id} stopping]", file=sys.stderr)
+
+# ...
+
+async def main(args):
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections,
+        limit_per_host=args.max_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=args.timeout),
+    )
+    executor = ProcessPoolExecutor(args.num_parsers)
+    queue = HostScheduler(
+        args.max_per_host,
+        args.host_rate,
+        args.frontier_window,
+        args.max_pending,
+        args.crawl_order,
+    )
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = CrawlCheckpoint(args.checkpoint, args.resume)
+    cache = ResponseCache(args.cache) if args.cache else None
+    results = writer = None
+    if args.results:
+        results = asyncio.Queue(maxsize=1000)
+        if args.results == "-":
+            results_file = sys.stdout
+        else:
+            results_file = open(args.results, mode="a", encoding="utf-8")
+        writer = asyncio.create_task(write_results(results, results_file))
+    try:
+        links = TopLinks(args.top)
+        parser = ParserPool(executor, 2 * args.num_parsers, args.fast_parser)
+        if args.bloom_capacity:
+            seen = SeenURLs(BloomFilter(args.bloom_capacity))
+        else:
+            seen = SeenURLs()
+        autoscaler = Autoscaler(
+            partial(
+                worker,
+                session=session,
+                queue=queue,
+                links=links,
+                max_depth=args.max_depth,
+                seen=seen,
+                parser=parser,
+                checkpoint=checkpoint,
+                results=results,
+                cache=cache,
+            ),
+            args.num_workers,
+            args.min_workers,
+            args.max_workers,
+            args.scale_interval,
+        )
+        tasks = [asyncio.create_task(autoscaler.run(queue))]
+        if checkpoint:
+            tasks.append(
+                asyncio.create_task(
+                    checkpoint.autosave(args.checkpoint_interval)
+                )
+            )
+        if args.report_interval:
+            tasks.append(
+                asyncio.create_task(report_top(links, args.report_interval))
+            )
+
+        if args.resume:
+            jobs = checkpoint.restore(links, seen)
+        else:
+            root_url = canonicalize_url(args.url)
+            links.update([root_url])
+            seen.add(root_url)
+            jobs = [Job(root_url)]
+            if checkpoint:
+                checkpoint.seed(jobs[0])
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+
+        tasks.extend(autoscaler.tasks.values())
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if writer:
+            await results.put(None)
+            await writer
+        if args.results != "-":
+            display(links)
+    finally:
+        if writer:
+            writer.cancel()
+            if results_file is not sys.stdout:
+                results_file.close()
+        if cache:
+            cache.close()
+        if checkpoint:
+            checkpoint.close()
+        queue.close()
+        executor.shutdown()
+        await session.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("-d", "--max-depth", type=int, default=2)
+    parser.add_argument("-w", "--num-workers", type=int, default=3)
+    parser.add_argument("--min-workers", type=int)
+    parser.add_argument("--max-workers", type=int)
+    parser.add_argument("--scale-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("-b", "--bloom-capacity", type=int, default=0)
+    parser.add_argument("-c", "--max-connections", type=int, default=100)
+    parser.add_argument("-p", "--max-per-host", type=int, default=2)
+    parser.add_argument("-r", "--host-rate", type=float, default=4.0)
+    parser.add_argument(
+        "-n",
+        "--num-parsers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument("-f", "--fast-parser", action="store_true")
+    parser.add_argument("--frontier-window", type=int, default=10_000)
+    parser.add_argument("--max-pending", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--crawl-order",
+        choices=SCORERS,
+        default="breadth-first",
+    )
+    parser.add_argument("-k", "--checkpoint")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("-j", "--results")
+    parser.add_argument("-t", "--top", type=int, default=100)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("-x", "--cache")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.min_workers is None:
+        args.min_workers = min(1, args.num_workers)
+    if args.max_workers is None:
+        args.max_workers = max(
+            1,
+            args.num_workers,
+            min(4 * args.num_workers, args.max_connections),
+        )
+    if not 0 <= args.min_workers <= args.num_workers <= args.max_workers:
+        parser.error("expected 0 <= --min-workers <= -w <= --max-workers")
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
+    return args
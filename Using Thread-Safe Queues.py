@@ -192,4 +192,202 @@ def main(args):
     ]
     # ...
 
+# thread_safe_queues.py
+
+from collections import deque
+from itertools import repeat
+from queue import Empty
+from time import monotonic
+
+# ...
+
+class SpinQueue:
+    def __init__(self, spins=100):
+        self.queue = deque()
+        self.spins = spins
+        self._tasks = deque()
+        self._parked = 0
+        self._not_empty = threading.Condition()
+        self._all_done = threading.Condition()
+
+    def qsize(self):
+        return len(self.queue)
+
+    def empty(self):
+        return not self.queue
+
+    def put(self, item, block=True, timeout=None):
+        self._tasks.append(None)
+        self.queue.append(item)
+        if self._parked:
+            with self._not_empty:
+                self._not_empty.notify()
+
+    def put_many(self, items):
+        items = list(items)
+        self._tasks.extend(repeat(None, len(items)))
+        self.queue.extend(items)
+        if self._parked:
+            with self._not_empty:
+                self._not_empty.notify(len(items))
+
+    def get(self, block=True, timeout=None):
+        try:
+            return self.queue.popleft()
+        except IndexError:
+            if not block:
+                raise Empty from None
+        for _ in range(self.spins):
+            sleep(0)
+            try:
+                return self.queue.popleft()
+            except IndexError:
+                pass
+        return self._park(timeout)
+
+    def get_many(self, max_items, block=True, timeout=None):
+        items = [self.get(block, timeout)]
+        try:
+            for _ in range(max_items - 1):
+                items.append(self.queue.popleft())
+        except IndexError:
+            pass
+        return items
+
+    def task_done(self):
+        try:
+            self._tasks.pop()
+        except IndexError:
+            raise ValueError("task_done() called too many times") from None
+        if not self._tasks:
+            with self._all_done:
+                self._all_done.notify_all()
+
+    def join(self):
+        with self._all_done:
+            while self._tasks:
+                self._all_done.wait()
+
+    def _park(self, timeout):
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._not_empty:
+            self._parked += 1
+            try:
+                while True:
+                    try:
+                        return self.queue.popleft()
+                    except IndexError:
+                        pass
+                    if deadline is None:
+                        self._not_empty.wait()
+                    elif (remaining := deadline - monotonic()) > 0:
+                        self._not_empty.wait(remaining)
+                    else:
+                        raise Empty
+            finally:
+                self._parked -= 1
+
+QUEUE_TYPES = {
+    "fifo": Queue,
+    "lifo": LifoQueue,
+    "heap": PriorityQueue,
+    "mpmc": SpinQueue,
+}
+
+# ...
 
+class View:
+    # ...
+
+    def render(self):
+        match self.buffer:
+            case SpinQueue():
+                title = "MPMC Queue"
+                products = reversed(list(self.buffer.queue))
+            # ...
+
+# queue_throughput.py
+
+import threading
+from itertools import product, repeat
+from queue import LifoQueue, PriorityQueue, Queue
+from time import perf_counter, sleep
+
+from thread_safe_queues import SpinQueue
+
+NUM_ITEMS = 200_000
+BATCH_SIZE = 100
+STOP = -1
+
+def producer(buffer, num_items, batch_size):
+    if batch_size == 1:
+        for item in range(num_items):
+            buffer.put(item)
+    else:
+        for start in range(0, num_items, batch_size):
+            buffer.put_many(range(start, min(start + batch_size, num_items)))
+
+def consumer(buffer, batch_size):
+    if batch_size == 1:
+        while buffer.get() != STOP:
+            pass
+    else:
+        while (items := buffer.get_many(batch_size))[-1] != STOP:
+            pass
+        buffer.put_many(repeat(STOP, items.count(STOP) - 1))
+
+def throughput(queue_type, num_producers, num_consumers, batch_size=1):
+    buffer = queue_type()
+    producers = [
+        threading.Thread(
+            target=producer,
+            args=(buffer, NUM_ITEMS // num_producers, batch_size),
+        )
+        for _ in range(num_producers)
+    ]
+    consumers = [
+        threading.Thread(target=consumer, args=(buffer, batch_size))
+        for _ in range(num_consumers)
+    ]
+    start = perf_counter()
+    for thread in producers + consumers:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    while not buffer.empty():
+        sleep(0.001)
+    for _ in consumers:
+        buffer.put(STOP)
+    for thread in consumers:
+        thread.join()
+    return NUM_ITEMS / (perf_counter() - start)
+
+if __name__ == "__main__":
+    scenarios = list(product((1, 4), (1, 4)))
+    candidates = {
+        "Queue": (Queue, 1),
+        "LifoQueue": (LifoQueue, 1),
+        "PriorityQueue": (PriorityQueue, 1),
+        "SpinQueue": (SpinQueue, 1),
+        f"SpinQueue x{BATCH_SIZE}": (SpinQueue, BATCH_SIZE),
+    }
+    print(f"{'items/sec':<20}", end="")
+    for num_producers, num_consumers in scenarios:
+        print(f"{f'{num_producers}P/{num_consumers}C':>12}", end="")
+    print()
+    for name, (queue_type, batch_size) in candidates.items():
+        print(f"{name:<20}", end="")
+        for num_producers, num_consumers in scenarios:
+            rate = throughput(
+                queue_type, num_producers, num_consumers, batch_size
+            )
+            print(f"{rate:>12,.0f}", end="", flush=True)
+        print()
+
+$ python queue_throughput.py
+items/sec                  1P/1C       1P/4C       4P/1C       4P/4C
+Queue                    478,680     467,512     388,470     413,437
+LifoQueue                470,225     291,556     276,609     300,075
+PriorityQueue            346,646     355,348     275,629     262,415
+SpinQueue              4,498,897   4,759,779   4,820,716   4,606,193
+SpinQueue x100         8,478,211   9,741,250   8,634,003   7,537,756